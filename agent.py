@@ -2,19 +2,48 @@
 Simple agent with tool calling capabilities
 """
 
-import json
 import logging
+import sys
 import time
-from typing import List, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+import orjson
 
 from api import SambanovaClient
 from tools import Tool
 
+# Number of result characters echoed to the console per tool call
+_PREVIEW = 200
+
+# Pre-encoded ANSI fragments for the tool call console output
+_PFX_TOOL_CALL = b"\n\x1b[1;34m[Tool Call]\x1b[0m "
+_PFX_ARGS = b"\x1b[2mArguments: "
+_PFX_RESULT = b"\x1b[2mResult: "
+_PFX_ERROR = b"\x1b[1;31m"
+_SFX_RESET = b"\x1b[0m\n"
+
+
+def _echo(*chunks: bytes):
+    """Write pre-encoded chunks to stdout with a single write call"""
+    data = b"".join(chunks)
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        # stdout replaced by a text-only stream (e.g. captured output)
+        sys.stdout.write(data.decode())
+        return
+    # Flush pending text written through print() first to keep the output ordered
+    sys.stdout.flush()
+    buffer.write(data)
+    buffer.flush()
+
 
 class Agent:
     """Agent that can use tools to answer questions"""
 
-    def __init__(self, client: SambanovaClient, tools: List[Tool], system_prompt: str = None, inter_call_delay: float = 0.5):
+    def __init__(self, client: SambanovaClient, tools: List[Tool], system_prompt: str = None, inter_call_delay: float = 0.5,
+                 allow_parallel_tools: bool = False, stream: bool = False, history_window: int = 4,
+                 max_tool_result_chars: int = 4000):
         """
         Initialize agent
 
@@ -23,13 +52,34 @@ class Agent:
             tools: List of available tools
             system_prompt: Optional system prompt
             inter_call_delay: Delay in seconds between successive API calls (default: 0.5)
+            allow_parallel_tools: Execute multiple tool calls from one response concurrently instead of
+                                  keeping only the first one (default: False, SambaNova only supports 1)
+            stream: Stream LLM responses and start each tool call as soon as its arguments are complete
+                    (default: False)
+            history_window: Number of most recent tool calling turns sent back to the LLM, at least 1 (default: 4)
+            max_tool_result_chars: Tool results longer than this are truncated before being added
+                                   to the conversation (default: 4000)
         """
+        if history_window < 1:
+            raise ValueError("history_window must be at least 1")
+
         self.client = client
         self.tools = {tool.name: tool for tool in tools}
         self.system_prompt = system_prompt or "You are a helpful AI assistant that can search the web for information."
         self.inter_call_delay = inter_call_delay
+        self.allow_parallel_tools = allow_parallel_tools
+        self.stream = stream
+        self.history_window = history_window
+        self.max_tool_result_chars = max_tool_result_chars
         self.logger = logging.getLogger(self.__class__.__name__)
 
+        # Static parts of every request, built once instead of on every run
+        self._tool_defs = [tool.to_dict() for tool in self.tools.values()]
+        self._system_msg = {"role": "system", "content": self.system_prompt}
+
+        # Worker threads for tool calls that run concurrently (parallel or streamed)
+        self._executor = ThreadPoolExecutor(thread_name_prefix="tool")
+
     def run(self, user_message: str, max_iterations: int = 5) -> str:
         """
         Run the agent with tool calling loop
@@ -42,29 +92,41 @@ class Agent:
             Final response text
         """
         messages = [
-            {"role": "system", "content": self.system_prompt},
+            self._system_msg,
             {"role": "user", "content": user_message}
         ]
 
-        tool_definitions = [tool.to_dict() for tool in self.tools.values()]
-        self.logger.info(f"Starting agent run with {len(tool_definitions)} available tools")
+        self.logger.info("Starting agent run with %s available tools", len(self._tool_defs))
 
         total_tool_calls = 0
+        # Index of the assistant message that starts each tool calling turn
+        turn_starts: List[int] = []
 
         for iteration in range(max_iterations):
-            self.logger.debug(f"Iteration {iteration + 1}/{max_iterations}")
+            self.logger.debug("Iteration %s/%s", iteration + 1, max_iterations)
 
             # Add delay between successive API calls (but not before the first call)
             if iteration > 0 and self.inter_call_delay > 0:
-                self.logger.debug(f"Waiting {self.inter_call_delay}s between API calls...")
+                self.logger.debug("Waiting %ss between API calls...", self.inter_call_delay)
                 time.sleep(self.inter_call_delay)
 
+            # Send system + user message and only the most recent turns. A turn is an assistant
+            # message plus its tool results, so a tool result is never separated from its call.
+            if len(turn_starts) > self.history_window:
+                context = messages[:2] + messages[turn_starts[-self.history_window]:]
+            else:
+                context = messages
+
             # Get response from LLM
+            started: Dict[int, Future] = {}
             try:
-                response = self.client.chat(messages=messages, tools=tool_definitions)
-                self.logger.debug(f"Received response from LLM")
+                if self.stream:
+                    response, started = self._stream_chat(context)
+                else:
+                    response = self.client.chat(messages=context, tools=self._tool_defs)
+                self.logger.debug("Received response from LLM")
             except Exception as e:
-                self.logger.error(f"Error calling LLM API: {str(e)}", exc_info=True)
+                self.logger.error("Error calling LLM API: %s", e, exc_info=True)
                 raise
 
             # Check if model wants to call a tool
@@ -73,66 +135,128 @@ class Agent:
             if not tool_calls:
                 # No tool calls, return the final response
                 final_response = response.get("content", "")
-                self.logger.info(f"Agent completed in {iteration + 1} iteration(s)")
-                self.logger.info(f"Total tool calls made: {total_tool_calls}")
-                self.logger.debug(f"Final response length: {len(final_response)} chars")
+                self.logger.info("Agent completed in %s iteration(s)", iteration + 1)
+                self.logger.info("Total tool calls made: %s", total_tool_calls)
+                self.logger.debug("Final response length: %s chars", len(final_response))
                 return final_response
 
             # IMPORTANT: SambaNova API doesn't support multiple tool calls in one message
             # Only process the first tool call to avoid 500 errors
-            if len(tool_calls) > 1:
-                self.logger.warning(f"Model requested {len(tool_calls)} tool calls, but SambaNova only supports 1 at a time. Processing only the first one.")
+            if len(tool_calls) > 1 and not self.allow_parallel_tools:
+                self.logger.warning("Model requested %s tool calls, but SambaNova only supports 1 at a time. Processing only the first one.", len(tool_calls))
                 tool_calls = [tool_calls[0]]
 
             # Add assistant message with tool calls to conversation
+            turn_starts.append(len(messages))
             messages.append({
                 "role": "assistant",
                 "content": response.get("content"),
                 "tool_calls": tool_calls
             })
 
-            self.logger.info(f"Processing {len(tool_calls)} tool call(s)")
+            self.logger.info("Processing %s tool call(s)", len(tool_calls))
+            total_tool_calls += len(tool_calls)
 
-            # Execute each tool call
-            for idx, tool_call in enumerate(tool_calls, 1):
-                function_name = tool_call["function"]["name"]
-                function_args = json.loads(tool_call["function"]["arguments"])
-
-                total_tool_calls += 1
-
-                # Log tool call details
-                self.logger.info(f"Tool call {idx}/{len(tool_calls)}: {function_name}")
-                self.logger.debug(f"Tool arguments: {json.dumps(function_args, indent=2)}")
-
-                # Print to console with color
-                print(f"\n\033[1;34m[Tool Call]\033[0m {function_name}")
-                print(f"\033[2mArguments: {json.dumps(function_args, indent=2)}\033[0m")
+            # Execute tool calls, concurrently when there is more than one (tools are I/O-bound).
+            # Calls already started while streaming only need to be awaited.
+            if len(tool_calls) > 1:
+                for index, tool_call in enumerate(tool_calls):
+                    if index not in started:
+                        started[index] = self._executor.submit(self._invoke, tool_call)
+            results = [
+                started[index].result() if index in started else self._invoke(tool_call)
+                for index, tool_call in enumerate(tool_calls)
+            ]
 
-                # Execute the tool
-                try:
-                    if function_name in self.tools:
-                        result = self.tools[function_name].execute(**function_args)
-                        result_preview = result[:200] + "..." if len(result) > 200 else result
-                        self.logger.info(f"Tool '{function_name}' executed successfully")
-                        self.logger.debug(f"Tool result length: {len(result)} chars")
-                        print(f"\033[2mResult: {result_preview}\033[0m\n")
-                    else:
-                        result = f"Error: Tool '{function_name}' not found"
-                        self.logger.error(f"Tool '{function_name}' not found in available tools")
-                        print(f"\033[1;31m{result}\033[0m\n")
-                except Exception as e:
-                    result = f"Error executing tool: {str(e)}"
-                    self.logger.error(f"Error executing tool '{function_name}': {str(e)}", exc_info=True)
-                    print(f"\033[1;31m{result}\033[0m\n")
-
-                # Add tool result to conversation
+            # Add tool results to conversation in the original call order
+            for tool_call_id, function_name, result in results:
+                if len(result) > self.max_tool_result_chars:
+                    dropped = len(result) - self.max_tool_result_chars
+                    result = result[:self.max_tool_result_chars] + f"\n[...truncated {dropped} chars]"
                 messages.append({
                     "role": "tool",
-                    "tool_call_id": tool_call["id"],
+                    "tool_call_id": tool_call_id,
                     "name": function_name,
                     "content": result
                 })
 
-        self.logger.warning(f"Max iterations ({max_iterations}) reached")
-        self.logger.info(f"Total tool calls made: {total_tool_calls}")
+        self.logger.warning("Max iterations (%s) reached", max_iterations)
+        self.logger.info("Total tool calls made: %s", total_tool_calls)
         return "Max iterations reached. Please try again with a simpler question."
+
+    def _stream_chat(self, messages: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[int, Future]]:
+        """
+        Stream an LLM response, dispatching tool calls while the rest is still being generated
+
+        Args:
+            messages: Conversation so far
+
+        Returns:
+            Tuple of (complete assistant message, futures of tool calls already started keyed by index)
+        """
+        started: Dict[int, Future] = {}
+        # Same limit as the non-streaming path: SambaNova only supports one call per message
+        limit = None if self.allow_parallel_tools else 1
+        response: Dict[str, Any] = {}
+
+        for response in self.client.chat_stream(messages=messages, tools=self._tool_defs):
+            for index, tool_call in enumerate(response.get("tool_calls") or []):
+                if index in started or (limit is not None and index >= limit) or not tool_call.get("id"):
+                    continue
+                arguments = tool_call["function"]["arguments"]
+                # Cheap check first, then make sure the arguments are complete JSON
+                if not arguments.rstrip().endswith("}"):
+                    continue
+                try:
+                    orjson.loads(arguments)
+                except orjson.JSONDecodeError:
+                    continue
+                self.logger.debug("Starting tool call %s while the response is still streaming", index)
+                started[index] = self._executor.submit(self._invoke, tool_call)
+
+        return response, started
+
+    def _invoke(self, tool_call: Dict[str, Any]) -> Tuple[str, str, str]:
+        """
+        Execute a single tool call
+
+        Args:
+            tool_call: Tool call from the LLM response
+
+        Returns:
+            Tuple of (tool_call_id, function name, result content)
+        """
+        function_name = tool_call["function"]["name"]
+        function_args = orjson.loads(tool_call["function"]["arguments"])
+        formatted_args = orjson.dumps(function_args, option=orjson.OPT_INDENT_2)
+
+        # Log tool call details
+        self.logger.info("Tool call: %s", function_name)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Tool arguments: %s", formatted_args.decode())
+
+        # Print to console with color
+        _echo(_PFX_TOOL_CALL, function_name.encode(), b"\n", _PFX_ARGS, formatted_args, _SFX_RESET)
+
+        # Execute the tool
+        try:
+            if function_name in self.tools:
+                result = self.tools[function_name].execute(**function_args)
+                result_preview = result[:_PREVIEW] + "..." if len(result) > _PREVIEW else result
+                self.logger.info("Tool '%s' executed successfully", function_name)
+                self.logger.debug("Tool result length: %s chars", len(result))
+                _echo(_PFX_RESULT, result_preview.encode(), _SFX_RESET, b"\n")
+            else:
+                result = f"Error: Tool '{function_name}' not found"
+                self.logger.error("Tool '%s' not found in available tools", function_name)
+                _echo(_PFX_ERROR, result.encode(), _SFX_RESET, b"\n")
+        except Exception as e:
+            result = f"Error executing tool: {str(e)}"
+            self.logger.error("Error executing tool '%s': %s", function_name, e, exc_info=True)
+            _echo(_PFX_ERROR, result.encode(), _SFX_RESET, b"\n")
+
+        return tool_call["id"], function_name, result
+
+    def close(self):
+        """Shut down the worker threads used for concurrent tool calls"""
+        self._executor.shutdown()
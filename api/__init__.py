@@ -2,7 +2,7 @@
 API module for different AI providers
 """
 
-from .base import APIClient
+from .base import APIClient, RateLimitError
 from .sambanova import SambanovaClient
 
-__all__ = ["APIClient", "SambanovaClient"]
+__all__ = ["APIClient", "RateLimitError", "SambanovaClient"]
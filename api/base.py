@@ -6,6 +6,10 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, List
 
 
+class RateLimitError(Exception):
+    """Raised when requests are refused locally because the provider's rate limit is exhausted"""
+
+
 class APIClient(ABC):
     """Abstract base class for AI API clients"""
 
@@ -2,35 +2,68 @@
 Sambanova API client implementation
 """
 
+import array
 import os
-import json
+import hashlib
 import logging
+import random
+import threading
 import time
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
-from .base import APIClient
-from utils import TokenCounter
+from .base import APIClient, RateLimitError
+from utils import TokenCounter, retry_delay_from_headers
+
+_BANNER = "=" * 80
+
+# Slots of the usage counter array
+_REQUESTS, _TOTAL, _PROMPT, _COMPLETION = range(4)
+
+# Consecutive 429 responses (across all requests in the process) after which the circuit
+# breaker opens, and its longest cool-down. This caps the retries of a single request at
+# _BREAKER_THRESHOLD - 1, whatever max_retries is set to.
+_BREAKER_THRESHOLD = 3
+_BREAKER_MAX_COOLDOWN = 60.0
 
 
 class SambanovaClient(APIClient):
     """Sambanova API client following Single Responsibility Principle"""
 
-    def __init__(self, api_key: str = None, model: str = "DeepSeek-V3.1", max_retries: int = 5, initial_retry_delay: float = 1.0):
+    # Circuit breaker shared by all clients in the process, since they share the same quota
+    _breaker = {"open_until": 0.0, "consecutive_429": 0}
+    _breaker_lock = threading.Lock()
+
+    def __init__(self, api_key: str = None, model: str = "DeepSeek-V3.1", max_retries: int = 5, initial_retry_delay: float = 1.0,
+                 cache_size: int = 128, token_counter: Optional[TokenCounter] = None,
+                 temperature: Optional[float] = None):
         """
         Initialize Sambanova client
 
         Args:
             api_key: Sambanova API key (defaults to SAMBANOVA_API_KEY env var)
             model: Model to use for completions
-            max_retries: Maximum number of retries for rate limit errors (default: 5)
+            max_retries: Maximum number of retries for rate limit errors (default: 5),
+                         effectively capped at _BREAKER_THRESHOLD - 1 by the circuit breaker
             initial_retry_delay: Initial delay in seconds before first retry (default: 1.0)
+            cache_size: Maximum number of cached responses for temperature=0 requests, 0 disables (default: 128)
+            token_counter: Optional counter for logging estimated input tokens; counting is skipped when None
+            temperature: Default sampling temperature sent with every request (server default when None)
         """
         self.api_key = api_key or os.getenv("SAMBANOVA_API_KEY")
         if not self.api_key:
             raise ValueError("API key must be provided or set in SAMBANOVA_API_KEY env var")
 
         self.model = model
+
+        # Request defaults; per-call kwargs take precedence
+        self.defaults: Dict[str, Any] = {}
+        if temperature is not None:
+            self.defaults["temperature"] = temperature
+
         self.base_url = "https://api.sambanova.ai/v1"
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -38,18 +71,30 @@ class SambanovaClient(APIClient):
         }
         self.logger = logging.getLogger(self.__class__.__name__)
 
+        # Persistent session so successive requests and retries reuse the TCP/TLS connection.
+        # The pool is sized for concurrent callers; retries are handled by chat() itself.
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0)
+        self._session.mount("https://", adapter)
+
         # Retry configuration
         self.max_retries = max_retries
         self.initial_retry_delay = initial_retry_delay
 
-        # Track cumulative usage
-        self.total_prompt_tokens = 0
-        self.total_completion_tokens = 0
-        self.total_tokens = 0
-        self.request_count = 0
+        # Track cumulative usage: requests, total, prompt and completion tokens.
+        # Updated under a lock since chat() may be called from several threads.
+        self._counters = array.array('Q', [0, 0, 0, 0])
+        self._counters_lock = threading.Lock()
 
-        # Token counter
-        self.token_counter = TokenCounter()
+        # Token counter (optional)
+        self.token_counter = token_counter
+
+        # LRU cache of deterministic (temperature=0) responses keyed by payload hash
+        self.cache_size = cache_size
+        # Messages are stored serialized so every hit returns a fresh dict the caller may modify
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def chat(self, messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]] = None, **kwargs) -> Dict[str, Any]:
         """
@@ -58,75 +103,216 @@ class SambanovaClient(APIClient):
         Args:
             messages: List of message dicts with 'role' and 'content'
             tools: Optional list of tool definitions for function calling
-            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            **kwargs: Additional parameters (temperature, max_tokens, etc.).
+                      Pass no_cache=True to bypass the response cache.
 
         Returns:
             The complete response data including message and tool calls
         """
+        no_cache = kwargs.pop("no_cache", False)
+
         payload = {
             "model": self.model,
             "messages": messages,
+            **self.defaults,
             **kwargs
         }
 
         if tools:
             payload["tools"] = tools
 
-        # Count tokens before sending
-        token_count = self.token_counter.count(messages, tools)
+        # Only deterministic requests are cacheable
+        cache_key = None
+        if self.cache_size > 0 and not no_cache and payload.get("temperature") == 0:
+            cache_key = hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                self.logger.info("Returning cached response (key %s)", cache_key[:16])
+                return cached
+
+        response = self._post(payload)
+        data = orjson.loads(response.content)
+
+        # Log usage statistics if available
+        if "usage" in data:
+            self._record_usage(data["usage"])
+
+        message = data["choices"][0]["message"]
+        if cache_key is not None:
+            self._cache_set(cache_key, message)
+
+        return message
+
+    def chat_stream(self, messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]] = None, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Send a streaming chat completion request and assemble the message from server-sent events
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            tools: Optional list of tool definitions for function calling
+            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+
+        Yields:
+            The partially assembled message after each event. The same dict is updated
+            in place, so the last value yielded is the complete message.
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            **self.defaults,
+            **kwargs,
+            "stream": True
+        }
+
+        if tools:
+            payload["tools"] = tools
+
+        message: Dict[str, Any] = {"role": "assistant", "content": "", "tool_calls": []}
+        tool_calls = message["tool_calls"]
+
+        with self._post(payload) as response:
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                event = line[5:].strip()
+                if event == b"[DONE]":
+                    break
+
+                chunk = orjson.loads(event)
+                if chunk.get("usage"):
+                    self._record_usage(chunk["usage"])
+                if not chunk.get("choices"):
+                    continue
+
+                delta = chunk["choices"][0].get("delta") or {}
+                if delta.get("content"):
+                    message["content"] += delta["content"]
+
+                # Tool call fragments arrive keyed by index; merge them into per-index buffers
+                for fragment in delta.get("tool_calls") or []:
+                    index = fragment.get("index", 0)
+                    while len(tool_calls) <= index:
+                        tool_calls.append({"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                    tool_call = tool_calls[index]
+                    if fragment.get("id"):
+                        tool_call["id"] = fragment["id"]
+                    function = fragment.get("function") or {}
+                    if function.get("name"):
+                        tool_call["function"]["name"] += function["name"]
+                    if function.get("arguments"):
+                        tool_call["function"]["arguments"] += function["arguments"]
+
+                yield message
+
+        yield message
+
+    def _post(self, payload: Dict[str, Any]) -> requests.Response:
+        """
+        POST a chat completion payload, retrying on rate limit errors
+
+        Args:
+            payload: Request payload
 
-        self.logger.info(f"Sending chat request to {self.base_url}/chat/completions")
-        self.logger.info(f"Model: {self.model}, Messages: {len(messages)}, Tools: {len(tools) if tools else 0}")
+        Returns:
+            The successful HTTP response (unread when the payload requests streaming)
+        """
+        # Fail fast while the rate limit circuit breaker is open, before any token counting or logging
+        with self._breaker_lock:
+            remaining = self._breaker["open_until"] - time.time()
+        if remaining > 0:
+            self.logger.warning("Rate limit circuit open, refusing request for another %.1fs", remaining)
+            raise RateLimitError(f"Rate limit exhausted, retry in {remaining:.1f}s")
+
+        messages = payload["messages"]
+        tools = payload.get("tools")
+        stream = payload.get("stream", False)
+
+        # Count tokens before sending, only if the estimate will actually be logged
+        token_count = 0
+        if self.token_counter and self.logger.isEnabledFor(logging.INFO):
+            token_count = self.token_counter.count(messages, tools)
+
+        self.logger.info("Sending chat request to %s/chat/completions", self.base_url)
+        self.logger.info("Model: %s, Messages: %s, Tools: %s", self.model, len(messages), len(tools) if tools else 0)
         if token_count > 0:
-            self.logger.info(f"Estimated input tokens: {token_count}")
+            self.logger.info("Estimated input tokens: %s", token_count)
+
+        # Serialize once; the same body is reused for logging and every retry attempt
+        body = orjson.dumps(payload)
 
         # Log the full request payload for rate limit debugging (compact to reduce log size)
-        self.logger.debug("=" * 80)
-        self.logger.debug("LLM REQUEST PAYLOAD:")
-        self.logger.debug("=" * 80)
-        self.logger.debug(json.dumps(payload))
-        self.logger.debug("=" * 80)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(_BANNER)
+            self.logger.debug("LLM REQUEST PAYLOAD:")
+            self.logger.debug(_BANNER)
+            self.logger.debug("%s", body.decode())
+            self.logger.debug(_BANNER)
 
         # Retry loop with exponential backoff
         for attempt in range(self.max_retries + 1):
             try:
-                response = requests.post(
+                response = self._session.post(
                     f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60
+                    data=body,
+                    timeout=60,
+                    stream=stream
                 )
 
                 # Log response status
-                self.logger.info(f"Response status: {response.status_code}")
+                self.logger.info("Response status: %s", response.status_code)
 
                 # Check for rate limit error
                 if response.status_code == 429:
+                    advertised = retry_delay_from_headers(response.headers)
+                    backoff = self.initial_retry_delay * (2 ** attempt)
+
+                    # Stop retrying altogether once the quota looks exhausted. Without an advertised
+                    # reset, cool down for as long as the skipped retries would have waited.
+                    if advertised is not None:
+                        reset_delay = advertised[0]
+                    else:
+                        reset_delay = sum(self.initial_retry_delay * (2 ** n) for n in range(attempt, self.max_retries)) or backoff
+                    cooldown = self._record_rate_limited(reset_delay)
+                    if cooldown is not None:
+                        response.close()
+                        self.logger.error("Rate limit circuit opened after %s consecutive 429s for %.1fs", _BREAKER_THRESHOLD, cooldown)
+                        raise RateLimitError(f"Rate limit exhausted, retry in {cooldown:.1f}s")
+
                     if attempt < self.max_retries:
-                        # Calculate exponential backoff delay
-                        delay = self.initial_retry_delay * (2 ** attempt)
-                        self.logger.warning(f"Rate limit exceeded (429). Retry {attempt + 1}/{self.max_retries} after {delay:.1f}s...")
+                        # Prefer the delay advertised by the server, fall back to exponential backoff
+                        if advertised is not None:
+                            delay, source = advertised
+                            # Jitter upwards only so we never retry before the advertised time
+                            delay *= random.uniform(1.0, 1.2)
+                        else:
+                            delay, source = backoff, "exponential backoff"
+                        self.logger.warning("Rate limit exceeded (429). Retry %s/%s after %.1fs (from %s)...", attempt + 1, self.max_retries, delay, source)
                         print(f"\n\033[1;33m⚠ Rate limit exceeded. Retrying in {delay:.1f}s... (attempt {attempt + 1}/{self.max_retries})\033[0m")
+                        # Release the connection back to the pool before waiting
+                        response.close()
                         time.sleep(delay)
                         continue
                     else:
-                        self.logger.error(f"Rate limit exceeded after {self.max_retries} retries")
-                        self.logger.error(f"Error response body: {response.text}")
+                        self.logger.error("Rate limit exceeded after %s retries", self.max_retries)
+                        self.logger.error("Error response body: %s", response.text)
                         response.raise_for_status()
 
-                # Log the full response for debugging
-                self.logger.debug("=" * 80)
-                self.logger.debug("LLM RESPONSE:")
-                self.logger.debug("=" * 80)
-                self.logger.debug(response.text)
-                self.logger.debug("=" * 80)
+                # Log the full response for debugging (streamed bodies are consumed by the caller)
+                if not stream and self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(_BANNER)
+                    self.logger.debug("LLM RESPONSE:")
+                    self.logger.debug(_BANNER)
+                    self.logger.debug("%s", response.text)
+                    self.logger.debug(_BANNER)
 
                 if response.status_code != 200:
-                    self.logger.error(f"Error response body: {response.text}")
+                    self.logger.error("Error response body: %s", response.text)
 
                 response.raise_for_status()
 
-                # Success - break out of retry loop
+                # Success - reset the circuit breaker and break out of retry loop
+                with self._breaker_lock:
+                    self._breaker["consecutive_429"] = 0
                 break
 
             except requests.exceptions.Timeout:
@@ -135,43 +321,96 @@ class SambanovaClient(APIClient):
             except requests.exceptions.RequestException as e:
                 # If it's not a rate limit error, re-raise immediately
                 if "429" not in str(e):
-                    self.logger.error(f"Request failed: {str(e)}")
+                    self.logger.error("Request failed: %s", e)
                     raise
                 # If it is a 429 and we're out of retries, re-raise
                 if attempt >= self.max_retries:
-                    self.logger.error(f"Request failed after {self.max_retries} retries: {str(e)}")
+                    self.logger.error("Request failed after %s retries: %s", self.max_retries, e)
                     raise
 
-        data = response.json()
-
-        # Log usage statistics if available
-        if "usage" in data:
-            usage = data["usage"]
-            prompt_tokens = usage.get("prompt_tokens", 0)
-            completion_tokens = usage.get("completion_tokens", 0)
-            total_tokens = usage.get("total_tokens", 0)
+        return response
 
-            # Update cumulative stats
-            self.total_prompt_tokens += prompt_tokens
-            self.total_completion_tokens += completion_tokens
-            self.total_tokens += total_tokens
-            self.request_count += 1
+    def _record_rate_limited(self, reset_delay: float) -> Optional[float]:
+        """
+        Count a 429 response and open the circuit breaker after too many in a row
 
-            self.logger.info(f"API Request #{self.request_count} - Tokens: {prompt_tokens} prompt + {completion_tokens} completion = {total_tokens} total")
-            self.logger.info(f"Cumulative usage - Total requests: {self.request_count}, Total tokens: {self.total_tokens} ({self.total_prompt_tokens} prompt + {self.total_completion_tokens} completion)")
+        Args:
+            reset_delay: Seconds until the quota is expected to reset
 
-        return data["choices"][0]["message"]
+        Returns:
+            Cool-down in seconds if the breaker was opened, otherwise None
+        """
+        with self._breaker_lock:
+            self._breaker["consecutive_429"] += 1
+            if self._breaker["consecutive_429"] < _BREAKER_THRESHOLD:
+                return None
+            cooldown = min(reset_delay, _BREAKER_MAX_COOLDOWN)
+            self._breaker["open_until"] = time.time() + cooldown
+            self._breaker["consecutive_429"] = 0
+            return cooldown
+
+    def _record_usage(self, usage: Dict[str, int]):
+        """
+        Add a response's token usage to the cumulative statistics
 
-    def get_usage_stats(self) -> Dict[str, int]:
+        Args:
+            usage: The 'usage' object of an API response
+        """
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        total_tokens = usage.get("total_tokens", 0)
+
+        # Update cumulative stats
+        with self._counters_lock:
+            counters = self._counters
+            counters[_REQUESTS] += 1
+            counters[_TOTAL] += total_tokens
+            counters[_PROMPT] += prompt_tokens
+            counters[_COMPLETION] += completion_tokens
+            request_count, cumulative_total, cumulative_prompt, cumulative_completion = counters
+
+        self.logger.info("API Request #%s - Tokens: %s prompt + %s completion = %s total", request_count, prompt_tokens, completion_tokens, total_tokens)
+        self.logger.info("Cumulative usage - Total requests: %s, Total tokens: %s (%s prompt + %s completion)", request_count, cumulative_total, cumulative_prompt, cumulative_completion)
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response and mark it as recently used"""
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                return None
+            self._cache.move_to_end(key)
+        return orjson.loads(cached)
+
+    def _cache_set(self, key: str, message: Dict[str, Any]):
+        """Store a response, evicting the least recently used entry when full"""
+        cached = orjson.dumps(message)
+        with self._cache_lock:
+            self._cache[key] = cached
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get_usage_stats(self) -> Dict[str, float]:
         """
         Get cumulative usage statistics
 
         Returns:
-            Dictionary with usage statistics
+            Dictionary with usage statistics and the time until which the
+            rate limit circuit breaker refuses requests (unix timestamp)
         """
+        with self._counters_lock:
+            request_count, total_tokens, prompt_tokens, completion_tokens = self._counters
+        with self._breaker_lock:
+            open_until = self._breaker["open_until"]
+
         return {
-            "total_requests": self.request_count,
-            "total_tokens": self.total_tokens,
-            "total_prompt_tokens": self.total_prompt_tokens,
-            "total_completion_tokens": self.total_completion_tokens
+            "total_requests": request_count,
+            "total_tokens": total_tokens,
+            "total_prompt_tokens": prompt_tokens,
+            "total_completion_tokens": completion_tokens,
+            "circuit_open_until": open_until
         }
+
+    def close(self):
+        """Close the underlying HTTP session and its pooled connections"""
+        self._session.close()
@@ -2,60 +2,117 @@
 """
 Quick script to check API rate limit headers
 """
+import argparse
 import os
+import time
 import requests
 from dotenv import load_dotenv
 from datetime import datetime, timezone
 
-# Load environment variables
-load_dotenv()
+from utils import get_rate_limit_headers, parse_reset_timestamp
 
-api_key = os.getenv("SAMBANOVA_API_KEY")
-if not api_key:
-    print("❌ SAMBANOVA_API_KEY not found in .env file")
-    exit(1)
+BASE_URL = "https://api.sambanova.ai/v1"
 
-# Make a minimal request to check headers
-url = "https://api.sambanova.ai/v1/chat/completions"
-headers = {
-    "Authorization": f"Bearer {api_key}",
-    "Content-Type": "application/json"
-}
-
-payload = {
+# Cheapest possible completion: one prompt character, one output token, stopped immediately
+PROBE_PAYLOAD = {
     "model": "DeepSeek-V3.1",
-    "messages": [{"role": "user", "content": "Hi"}],
-    "max_tokens": 10
+    "messages": [{"role": "user", "content": "."}],
+    "max_tokens": 1,
+    "stop": ["."]
 }
 
-print("Making request to Sambanova API...")
-response = requests.post(url, headers=headers, json=payload)
-
-print(f"\n📊 Response Status: {response.status_code}")
-print("\n" + "="*60)
-print("RATE LIMIT HEADERS:")
-print("="*60)
-
-# Display all rate limit related headers
-rate_limit_headers = {k: v for k, v in response.headers.items() if 'ratelimit' in k.lower()}
-
-if rate_limit_headers:
-    for header, value in rate_limit_headers.items():
-        print(f"{header}: {value}")
-
-        # If this is the reset header, convert timestamp to readable format
-        if 'reset' in header.lower() and value.isdigit():
-            timestamp = int(value)
-            reset_time = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-            now = datetime.now(timezone.utc)
-            time_until_reset = reset_time - now
-
-            print(f"  └─ Resets at: {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            print(f"  └─ Time until reset: {time_until_reset}")
-else:
-    print("No rate limit headers found in response")
-    print("\nAll response headers:")
-    for header, value in response.headers.items():
-        print(f"{header}: {value}")
-
-print("="*60)
+
+def probe(session: requests.Session) -> requests.Response:
+    """
+    Fetch rate limit headers with as little billable work as possible
+
+    Tries the free models endpoint first and only falls back to a
+    minimal chat completion when it does not report rate limit headers.
+    """
+    response = session.get(f"{BASE_URL}/models")
+    if get_rate_limit_headers(response.headers):
+        print("Rate limit headers read from /models")
+        return response
+
+    print("No rate limit headers on /models, sending minimal chat completion...")
+    return session.post(f"{BASE_URL}/chat/completions", json=PROBE_PAYLOAD)
+
+
+def print_rate_limit_headers(response: requests.Response) -> float:
+    """
+    Display rate limit headers
+
+    Returns:
+        Latest reset timestamp found in the headers, or 0 if none
+    """
+    print(f"\n📊 Response Status: {response.status_code}")
+    print("\n" + "="*60)
+    print("RATE LIMIT HEADERS:")
+    print("="*60)
+
+    # Display all rate limit related headers
+    rate_limit_headers = get_rate_limit_headers(response.headers)
+    latest_reset = 0
+
+    if rate_limit_headers:
+        for header, value in rate_limit_headers.items():
+            print(f"{header}: {value}")
+
+            # If this is the reset header, convert timestamp to readable format
+            timestamp = parse_reset_timestamp(value) if 'reset' in header.lower() else None
+            if timestamp is not None:
+                latest_reset = max(latest_reset, timestamp)
+                reset_time = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+                now = datetime.now(timezone.utc)
+                time_until_reset = reset_time - now
+
+                print(f"  └─ Resets at: {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+                print(f"  └─ Time until reset: {time_until_reset}")
+    else:
+        print("No rate limit headers found in response")
+        print("\nAll response headers:")
+        for header, value in response.headers.items():
+            print(f"{header}: {value}")
+
+    print("="*60)
+    return latest_reset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--poll", action="store_true",
+                        help="Keep checking, sleeping until each advertised quota reset")
+    args = parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+
+    api_key = os.getenv("SAMBANOVA_API_KEY")
+    if not api_key:
+        print("❌ SAMBANOVA_API_KEY not found in .env file")
+        exit(1)
+
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    })
+
+    while True:
+        print("Making request to Sambanova API...")
+        latest_reset = print_rate_limit_headers(probe(session))
+
+        if not args.poll:
+            break
+        if not latest_reset:
+            print("No reset timestamp advertised, stopping poll")
+            break
+
+        # Wake up just after the quota resets instead of busy-polling
+        delay = max(latest_reset - time.time(), 0) + 1
+        print(f"\nSleeping {delay:.0f}s until quota reset...\n")
+        time.sleep(delay)
+
+
+if __name__ == "__main__":
+    main()
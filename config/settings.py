@@ -7,9 +7,9 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Settings:
-    """Application settings"""
+    """Application settings (immutable, so one instance can be shared across threads)"""
 
     api_key: str
     model: str = "DeepSeek-V3.1"
@@ -29,24 +29,21 @@ class Settings:
         Returns:
             Settings instance with values from environment
         """
-        api_key = os.getenv("SAMBANOVA_API_KEY")
+        env = os.environ
+
+        api_key = env.get("SAMBANOVA_API_KEY")
         if not api_key:
             raise ValueError("SAMBANOVA_API_KEY environment variable must be set")
 
-        google_api_key = os.getenv("GOOGLE_API_KEY")
-        google_cse_id = os.getenv("GOOGLE_CSE_ID")
-
-        if not google_api_key or not google_cse_id:
-            raise ValueError("GOOGLE_API_KEY and GOOGLE_CSE_ID environment variables must be set")
-
+        # Google credentials are optional here; WebSearchTool validates them when it is created
         return cls(
             api_key=api_key,
-            model=os.getenv("MODEL", "Meta-Llama-3.1-8B-Instruct"),
-            temperature=float(os.getenv("TEMPERATURE", "0.7")),
-            max_tokens=int(os.getenv("MAX_TOKENS", "1000")),
-            google_api_key=google_api_key,
-            google_cse_id=google_cse_id,
-            max_retries=int(os.getenv("MAX_RETRIES", "5")),
-            initial_retry_delay=float(os.getenv("INITIAL_RETRY_DELAY", "1.0")),
-            inter_call_delay=float(os.getenv("INTER_CALL_DELAY", "0.5"))
+            model=env.get("MODEL", "Meta-Llama-3.1-8B-Instruct"),
+            temperature=float(env.get("TEMPERATURE", "0.7")),
+            max_tokens=int(env.get("MAX_TOKENS", "1000")),
+            google_api_key=env.get("GOOGLE_API_KEY"),
+            google_cse_id=env.get("GOOGLE_CSE_ID"),
+            max_retries=int(env.get("MAX_RETRIES", "5")),
+            initial_retry_delay=float(env.get("INITIAL_RETRY_DELAY", "1.0")),
+            inter_call_delay=float(env.get("INTER_CALL_DELAY", "0.5"))
         )
@@ -2,14 +2,20 @@
 Interactive terminal interface for AI agent with CPU/GPU information
 """
 
+import argparse
+import atexit
 import logging
+import queue
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from dotenv import load_dotenv
 
 from api import SambanovaClient
 from config import Settings
 from tools import WebSearchTool, SpecParserTool
+from utils import TokenCounter
 from agent import Agent
 
 
@@ -36,10 +42,16 @@ def setup_logging():
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
 
+    # Write the (verbose) file log from a background thread so disk I/O stays off the request path
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG)
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(QueueHandler(log_queue))
     root_logger.addHandler(console_handler)
 
     return log_filename
@@ -57,8 +69,118 @@ def print_welcome():
     print("\n" + "=" * 80 + "\n")
 
 
+def run_interactive(agent: Agent, logger: logging.Logger) -> int:
+    """
+    Run the interactive conversation loop
+
+    Returns:
+        Number of conversations held
+    """
+    # Print welcome message
+    print_welcome()
+
+    # Main conversation loop
+    conversation_count = 0
+    while True:
+        try:
+            # Get user input
+            user_input = input("\n\033[1;36mYou:\033[0m ").strip()
+
+            # Check for exit commands
+            if user_input.lower() in ['exit', 'quit', 'q']:
+                print("\n\033[1;33mGoodbye!\033[0m\n")
+                logger.info("User requested exit")
+                break
+
+            # Skip empty inputs
+            if not user_input:
+                continue
+
+            conversation_count += 1
+            logger.info(f"[Conversation #{conversation_count}] User: {user_input}")
+
+            # Print separator
+            print("\n" + "-" * 80)
+            print("\033[1;35mAgent is thinking...\033[0m")
+            print("-" * 80 + "\n")
+
+            # Get agent response
+            start_time = datetime.now()
+            response = agent.run(user_message=user_input)
+            end_time = datetime.now()
+            duration = (end_time - start_time).total_seconds()
+
+            # Log response
+            logger.info(f"[Conversation #{conversation_count}] Response time: {duration:.2f}s")
+            logger.info(f"[Conversation #{conversation_count}] Agent response length: {len(response)} chars")
+
+            # Print response
+            print("\033[1;32mAgent:\033[0m")
+            print(response)
+            print("\n" + "=" * 80)
+            print(f"\033[2mResponse time: {duration:.2f}s\033[0m")
+
+        except KeyboardInterrupt:
+            print("\n\n\033[1;33mInterrupted. Type 'exit' to quit or continue chatting.\033[0m")
+            logger.warning("Keyboard interrupt received")
+            continue
+        except Exception as e:
+            print(f"\n\033[1;31mError: {str(e)}\033[0m\n")
+            logger.error(f"Error during conversation: {str(e)}", exc_info=True)
+            continue
+
+    return conversation_count
+
+
+def run_batch(agent: Agent, path: str, workers: int, logger: logging.Logger) -> int:
+    """
+    Answer every non-empty line of a file, running up to `workers` queries concurrently
+
+    Results are printed in the order of the input lines.
+
+    Returns:
+        Number of queries answered
+    """
+    with open(path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    logger.info(f"Batch mode: {len(queries)} queries from {path} with {workers} worker(s)")
+
+    def answer(query: str):
+        start_time = datetime.now()
+        try:
+            response = agent.run(user_message=query)
+        except Exception as e:
+            logger.error(f"Error answering batch query '{query}': {str(e)}", exc_info=True)
+            response = f"\033[1;31mError: {str(e)}\033[0m"
+        return response, (datetime.now() - start_time).total_seconds()
+
+    # The agent and client are shared by all workers; map() yields results in submission order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for index, (query, (response, duration)) in enumerate(zip(queries, executor.map(answer, queries)), 1):
+            logger.info(f"[Batch #{index}] Response time: {duration:.2f}s")
+            print("\n" + "=" * 80)
+            print(f"\033[1;36m[{index}/{len(queries)}] {query}\033[0m")
+            print("\033[1;32mAgent:\033[0m")
+            print(response)
+            print(f"\033[2mResponse time: {duration:.2f}s\033[0m")
+
+    return len(queries)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="CPU/GPU information agent")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Answer each line of FILE non-interactively instead of starting the terminal")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of batch queries processed concurrently (default: 4)")
+    return parser.parse_args()
+
+
 def main():
     """Main entry point with interactive terminal interface"""
+    args = parse_args()
+
     # Load environment variables
     load_dotenv()
 
@@ -81,7 +203,9 @@ def main():
             api_key=settings.api_key,
             model=settings.model,
             max_retries=settings.max_retries,
-            initial_retry_delay=settings.initial_retry_delay
+            initial_retry_delay=settings.initial_retry_delay,
+            token_counter=TokenCounter(),
+            temperature=settings.temperature
         )
 
         # Initialize tools
@@ -102,58 +226,10 @@ def main():
         )
         logger.info("Agent initialized successfully")
 
-        # Print welcome message
-        print_welcome()
-
-        # Main conversation loop
-        conversation_count = 0
-        while True:
-            try:
-                # Get user input
-                user_input = input("\n\033[1;36mYou:\033[0m ").strip()
-
-                # Check for exit commands
-                if user_input.lower() in ['exit', 'quit', 'q']:
-                    print("\n\033[1;33mGoodbye!\033[0m\n")
-                    logger.info("User requested exit")
-                    break
-
-                # Skip empty inputs
-                if not user_input:
-                    continue
-
-                conversation_count += 1
-                logger.info(f"[Conversation #{conversation_count}] User: {user_input}")
-
-                # Print separator
-                print("\n" + "-" * 80)
-                print("\033[1;35mAgent is thinking...\033[0m")
-                print("-" * 80 + "\n")
-
-                # Get agent response
-                start_time = datetime.now()
-                response = agent.run(user_message=user_input)
-                end_time = datetime.now()
-                duration = (end_time - start_time).total_seconds()
-
-                # Log response
-                logger.info(f"[Conversation #{conversation_count}] Response time: {duration:.2f}s")
-                logger.info(f"[Conversation #{conversation_count}] Agent response length: {len(response)} chars")
-
-                # Print response
-                print("\033[1;32mAgent:\033[0m")
-                print(response)
-                print("\n" + "=" * 80)
-                print(f"\033[2mResponse time: {duration:.2f}s\033[0m")
-
-            except KeyboardInterrupt:
-                print("\n\n\033[1;33mInterrupted. Type 'exit' to quit or continue chatting.\033[0m")
-                logger.warning("Keyboard interrupt received")
-                continue
-            except Exception as e:
-                print(f"\n\033[1;31mError: {str(e)}\033[0m\n")
-                logger.error(f"Error during conversation: {str(e)}", exc_info=True)
-                continue
+        if args.batch:
+            conversation_count = run_batch(agent, args.batch, args.workers, logger)
+        else:
+            conversation_count = run_interactive(agent, logger)
 
         # Print session summary
         usage_stats = client.get_usage_stats()
@@ -166,6 +242,10 @@ def main():
         print(f"  - Logs saved to: {log_file}\n")
         logger.info(f"Session ended. Total conversations: {conversation_count}")
         logger.info(f"Final usage stats: {usage_stats}")
+        agent.close()
+        client.close()
+        for tool in tools:
+            tool.close()
 
     except ValueError as e:
         print(f"\n\033[1;31mConfiguration Error: {str(e)}\033[0m")
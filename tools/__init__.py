@@ -3,7 +3,21 @@ Tools module for agent capabilities
 """
 
 from .base import Tool
-from .web_search import WebSearchTool
-from .spec_parser import SpecParserTool
 
 __all__ = ["Tool", "WebSearchTool", "SpecParserTool"]
+
+# Concrete tools are imported on first access (PEP 562), so importing the
+# package does not pull in backends such as googleapiclient until needed
+_LAZY = {
+    "WebSearchTool": ".web_search",
+    "SpecParserTool": ".spec_parser",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
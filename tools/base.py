@@ -40,13 +40,20 @@ class Tool(ABC):
         """
         pass
 
+    def close(self):
+        """Release resources held by the tool (e.g. network connections)"""
+        pass
+
     def to_dict(self) -> Dict[str, Any]:
-        """Convert tool to OpenAI function calling format"""
-        return {
-            "type": "function",
-            "function": {
-                "name": self.name,
-                "description": self.description,
-                "parameters": self.parameters
+        """Convert tool to OpenAI function calling format (built once per tool)"""
+        definition = self.__dict__.get("_definition")
+        if definition is None:
+            definition = self._definition = {
+                "type": "function",
+                "function": {
+                    "name": self.name,
+                    "description": self.description,
+                    "parameters": self.parameters
+                }
             }
-        }
+        return definition
@@ -3,26 +3,75 @@ Parse and extract CPU/GPU specs from text
 """
 
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 from .base import Tool
 
+# Sentence boundaries: map '.', '!' and '?' onto '\n' so a plain str.split('\n') splits
+# on all four in one C-level pass (runs of delimiters leave empty strings, skipped below)
+_SENT_TRANS = str.maketrans(".!?", "\n\n\n")
+
+# Leading list numbering ("1. "), compiled once at import
+_NUM_PREFIX = re.compile(r'^\d+\.\s*')
+
+# Only the head of very long inputs is scanned; search snippets are far shorter than this
+_MAX_TEXT_CHARS = 65536
+
+# Number of spec lines returned
+_MAX_SPEC_LINES = 8
+
+
+def _keyword_pattern(keywords: Iterable[str]) -> "re.Pattern[str]":
+    """
+    Compile keywords into a prefix-factored regex, e.g. ["l1", "l2", "ddr"] -> "(?:ddr|l[12])"
+
+    The alternation has one branch per distinct first character, so at each position the
+    regex engine walks a trie instead of trying every keyword in turn. Only use it to test
+    whether any keyword occurs: a keyword that extends a shorter one is pruned.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # a keyword ends here
+    return re.compile(_trie_to_regex(trie))
+
+
+def _trie_to_regex(node: Dict[str, dict]) -> str:
+    """Render a keyword trie node as a regex fragment"""
+    children = sorted((char, child) for char, child in node.items() if char)
+    # A child where a keyword ends is already a match, whatever follows it
+    leaves = [re.escape(char) for char, child in children if "" in child]
+    branches = [re.escape(char) + _trie_to_regex(child) for char, child in children if "" not in child]
+    if len(leaves) > 1:
+        branches.append("[" + "".join(leaves) + "]")
+    else:
+        branches.extend(leaves)
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
 
 class SpecParserTool(Tool):
     """Extract CPU/GPU specs from text"""
 
-    # Keywords for CPU specs
-    CPU_KEYWORDS = [
+    # Keywords for CPU specs (tuples, since the patterns below are compiled from them once)
+    CPU_KEYWORDS = (
         "cores", "threads", "ghz", "mhz", "cache", "tdp", "socket",
         "nm", "architecture", "base clock", "boost clock", "turbo",
         "l1", "l2", "l3", "pcie", "ddr", "ram"
-    ]
+    )
 
     # Keywords for GPU specs
-    GPU_KEYWORDS = [
+    GPU_KEYWORDS = (
         "cuda", "stream processors", "memory", "vram", "gb", "gddr",
         "bandwidth", "clock", "tdp", "watts", "nm", "cores",
         "ray tracing", "tensor", "pcie", "bit", "mhz", "ghz"
-    ]
+    )
+
+    # One trie-shaped pattern per keyword list, so each sentence is scanned once. Matched against
+    # the lowercased sentence (re.IGNORECASE is several times slower) and without word boundaries,
+    # so keywords still match as substrings ("16gb", "ddr5") like the plain `in` test did.
+    _CPU_PATTERN = _keyword_pattern(CPU_KEYWORDS)
+    _GPU_PATTERN = _keyword_pattern(GPU_KEYWORDS)
 
     @property
     def name(self) -> str:
@@ -54,10 +103,13 @@ class SpecParserTool(Tool):
         Returns:
             Concise spec string
         """
-        keywords = self.CPU_KEYWORDS if hardware_type.lower() == "cpu" else self.GPU_KEYWORDS
+        if not text or text.isspace():
+            return "No specs found"
+
+        keyword_pattern = self._CPU_PATTERN if hardware_type.lower() == "cpu" else self._GPU_PATTERN
 
         # Split into sentences
-        sentences = re.split(r'[.!?\n]+', text)
+        sentences = text[:_MAX_TEXT_CHARS].translate(_SENT_TRANS).split("\n")
 
         # Find sentences with specs
         spec_lines = []
@@ -67,13 +119,14 @@ class SpecParserTool(Tool):
                 continue
 
             # Check if sentence contains any spec keywords
-            lower_sentence = sentence.lower()
-            if any(kw in lower_sentence for kw in keywords):
+            if keyword_pattern.search(sentence.lower()):
                 # Remove numbering (1., 2., etc.)
-                cleaned = re.sub(r'^\d+\.\s*', '', sentence)
+                cleaned = _NUM_PREFIX.sub('', sentence)
                 spec_lines.append(cleaned)
+                if len(spec_lines) == _MAX_SPEC_LINES:
+                    break
 
         if not spec_lines:
             return "No specs found"
 
-        return "\n".join(spec_lines[:8])  # Limit to 8 most relevant lines
+        return "\n".join(spec_lines)
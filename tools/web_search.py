@@ -2,36 +2,112 @@
 Web search tool using Google Custom Search API
 """
 
-from typing import Dict, Any, List
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
 from .base import Tool
 
+# Query parameters that only track the click and never change the page
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = frozenset({"gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "_ga"})
+
+
+def _canonical_url(url: str) -> str:
+    """
+    Normalize a result link for deduplication
+
+    Lowercases the host, drops the fragment and tracking parameters, and sorts the
+    remaining query so pages keyed by query (e.g. cpu.php?cpu=...) stay distinct.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PREFIXES) and key.lower() not in _TRACKING_PARAMS
+    ))
+    canonical = f"{parts.scheme}://{parts.netloc.lower()}{parts.path.rstrip('/')}"
+    return f"{canonical}?{query}" if query else canonical
+
 
 class WebSearchTool(Tool):
     """Web search tool for finding CPU/GPU information"""
 
-    def __init__(self, api_key: str = None, cse_id: str = None):
+    # Built services shared by every instance, keyed by (api_key, cse_id), since
+    # parsing the discovery document is the expensive part of build()
+    _SERVICE_CACHE: Dict[Tuple[str, str], Any] = {}
+    _SERVICE_LOCK = threading.Lock()
+
+    def __init__(self, api_key: str = None, cse_id: str = None, cache_size: int = 256, cache_ttl: float = 3600.0):
         """
         Initialize the Google Custom Search tool
 
         Args:
             api_key: Google API key
             cse_id: Custom Search Engine ID
+            cache_size: Maximum number of cached query results, 0 disables (default: 256)
+            cache_ttl: Seconds a cached result stays valid (default: 3600)
         """
+        if not api_key or not cse_id:
+            raise ValueError("GOOGLE_API_KEY and GOOGLE_CSE_ID must be set to use web search")
+
         self.api_key = api_key
         self.cse_id = cse_id
         self._service = None
+        self._local = threading.local()
+        # Every per-thread transport, so close() can release all pooled connections
+        self._https: List[Any] = []
+        self._https_lock = threading.Lock()
+
+        # LRU cache of formatted results keyed by (normalized query, num results)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Searches currently running, so concurrent identical queries share one request
+        self._inflight: Dict[Tuple[str, int], Future] = {}
 
     def _get_service(self):
         """Lazy initialization of Google Custom Search service"""
         if self._service is None:
-            if not self.api_key or not self.cse_id:
-                raise ValueError("Google API key and CSE ID must be provided")
-            self._service = build("customsearch", "v1", developerKey=self.api_key)
+            key = (self.api_key, self.cse_id)
+            with self._SERVICE_LOCK:
+                service = self._SERVICE_CACHE.get(key)
+                if service is None:
+                    # googleapiclient is slow to import, so defer it until the first search
+                    from googleapiclient.discovery import build
+                    service = self._SERVICE_CACHE[key] = build(
+                        "customsearch", "v1", developerKey=self.api_key, cache_discovery=False
+                    )
+            self._service = service
         return self._service
 
+    def _get_http(self):
+        """
+        Per-thread HTTP transport, since httplib2 connections are not thread-safe
+
+        Each transport is kept for the lifetime of the tool, so repeated searches
+        from the same thread reuse its keep-alive connection.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            from googleapiclient.http import build_http
+            http = self._local.http = build_http()
+            with self._https_lock:
+                self._https.append(http)
+        return http
+
+    def close(self):
+        """Close all pooled HTTP connections"""
+        with self._https_lock:
+            for http in self._https:
+                http.close()
+            self._https.clear()
+        self._local = threading.local()
+
     @property
     def name(self) -> str:
         return "web_search"
@@ -62,40 +138,106 @@ class WebSearchTool(Tool):
         Returns:
             Formatted search results
         """
-        try:
-            if not self.api_key or not self.cse_id:
-                return "Error: Google API credentials not configured. Please set GOOGLE_API_KEY and GOOGLE_CSE_ID."
-
-            service = self._get_service()
+        # Handle None value for max_results (can happen when LLM passes null)
+        if max_results is None:
+            max_results = 5
+
+        # Google Custom Search API returns max 10 results per request
+        num_results = min(max_results, 10)
+
+        key = (query.strip().lower(), num_results)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        with self._cache_lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                future = self._inflight[key] = Future()
+        if pending is not None:
+            # Another thread is already running this query; wait for its result
+            return pending.result()
 
-            # Handle None value for max_results (can happen when LLM passes null)
-            if max_results is None:
-                max_results = 5
-
-            # Google Custom Search API returns max 10 results per request
-            num_results = min(max_results, 10)
-
-            result = service.cse().list(
-                q=query,
-                cx=self.cse_id,
-                num=num_results
-            ).execute()
-
-            items = result.get('items', [])
-
-            if not items:
-                return f"No results found for query: {query}"
-
-            formatted_results = []
-            for i, result in enumerate(items, 1):
-                snippet = result.get('snippet', '')
-                # Only extract specification data from snippet
-                if snippet:
-                    formatted_results.append(f"{i}. {snippet}")
+        try:
+            formatted = self._search(query, num_results)
+        except Exception as e:
+            formatted = f"Error performing search: {str(e)}"
+        else:
+            # Only successful searches are cached, so transient failures are retried
+            self._cache_set(key, formatted)
+        finally:
+            with self._cache_lock:
+                del self._inflight[key]
+
+        future.set_result(formatted)
+        return formatted
+
+    def _search(self, query: str, num_results: int) -> str:
+        """
+        Run a search against the Custom Search API
 
-            return "\n".join(formatted_results)
+        Args:
+            query: Search query string
+            num_results: Number of results to request (at most 10)
 
-        except HttpError as e:
-            return f"Error performing search: {str(e)}"
-        except Exception as e:
-            return f"Error performing search: {str(e)}"
+        Returns:
+            Formatted search results
+        """
+        service = self._get_service()
+
+        result = service.cse().list(
+            q=query,
+            cx=self.cse_id,
+            num=num_results,
+            # Partial response: only the fields read below are returned by the server
+            fields="items(link,snippet)"
+        ).execute(http=self._get_http())
+
+        items = result.get('items', [])
+
+        if not items:
+            return f"No results found for query: {query}"
+
+        # The same page can come back under several URLs (tracking params, anchors)
+        seen = set()
+        unique_items = []
+        for item in items:
+            link = item.get('link')
+            if link:
+                key = _canonical_url(link)
+                if key in seen:
+                    continue
+                seen.add(key)
+            unique_items.append(item)
+
+        # Only extract specification data from snippet
+        return "\n".join([
+            f"{i}. {snippet}"
+            for i, result in enumerate(unique_items, 1)
+            if (snippet := result.get('snippet'))
+        ])
+
+    def _cache_get(self, key: Tuple[str, int]) -> Optional[str]:
+        """Look up a cached result that has not expired"""
+        if self.cache_size <= 0:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, formatted = entry
+            if time.monotonic() - stored_at > self.cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return formatted
+
+    def _cache_set(self, key: Tuple[str, int], formatted: str):
+        """Store a result, evicting the least recently used entry when full"""
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), formatted)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
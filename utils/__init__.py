@@ -3,5 +3,6 @@ Utility modules
 """
 
 from .token_counter import TokenCounter
+from .rate_limit import get_rate_limit_headers, parse_reset_timestamp, retry_delay_from_headers
 
-__all__ = ["TokenCounter"]
+__all__ = ["TokenCounter", "get_rate_limit_headers", "parse_reset_timestamp", "retry_delay_from_headers"]
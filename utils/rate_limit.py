@@ -0,0 +1,91 @@
+"""
+Rate limit header parsing utilities
+"""
+
+import math
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+# Upper bound for any server-advertised retry delay
+MAX_RETRY_DELAY = 60.0
+
+
+def get_rate_limit_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    """
+    Extract rate limit related headers from a response
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Dictionary of headers whose name contains 'ratelimit'
+    """
+    return {k: v for k, v in headers.items() if 'ratelimit' in k.lower()}
+
+
+def parse_reset_timestamp(value: str) -> Optional[int]:
+    """
+    Parse an x-ratelimit-reset header value
+
+    Args:
+        value: Header value (unix timestamp in seconds)
+
+    Returns:
+        Unix timestamp, or None if the value is not a timestamp
+    """
+    value = value.strip()
+    return int(value) if value.isdigit() else None
+
+
+def retry_delay_from_headers(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[Tuple[float, str]]:
+    """
+    Compute how long to wait before retrying, based on the server's rate limit headers
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        now: Current unix time (defaults to time.time())
+
+    Returns:
+        Tuple of (delay in seconds clamped to [0, MAX_RETRY_DELAY], header used),
+        or None if no usable header is present
+    """
+    now = time.time() if now is None else now
+
+    retry_after = headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            # Retry-After may also be an HTTP date
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - now
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None and math.isfinite(delay):
+            return min(max(delay, 0.0), MAX_RETRY_DELAY), "Retry-After"
+
+    rate_limit_headers = {k.lower(): v for k, v in get_rate_limit_headers(headers).items()}
+    exhausted = []
+    resets = []
+    for header, value in rate_limit_headers.items():
+        if 'reset' not in header or (timestamp := parse_reset_timestamp(value)) is None:
+            continue
+        resets.append(timestamp)
+        # x-ratelimit-reset-requests-day pairs with x-ratelimit-remaining-requests-day
+        remaining = rate_limit_headers.get(header.replace('reset', 'remaining'), '').strip()
+        if remaining == '0':
+            exhausted.append(timestamp)
+
+    if exhausted:
+        # Every exhausted limit blocks the request, so wait until the last of them resets
+        reset = max(exhausted)
+    elif resets:
+        # Can't tell which limit was hit; the soonest future reset is the minimum useful wait
+        future = [timestamp for timestamp in resets if timestamp > now]
+        reset = min(future) if future else now
+    else:
+        return None
+
+    delay = float(reset - now)
+    return min(max(delay, 0.0), MAX_RETRY_DELAY), "x-ratelimit-reset"
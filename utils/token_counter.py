@@ -4,38 +4,72 @@ Token counting utility
 
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 
 
 class TokenCounter:
     """Counts tokens using the model's tokenizer"""
 
-    def __init__(self, model_name: str = "gpt2"):
+    # Loaded tokenizers shared by every counter, keyed by model_name (False marks a failed load)
+    _TOKENIZER_CACHE: Dict[str, Any] = {}
+    _LOCK = threading.Lock()
+
+    def __init__(self, model_name: str = "cl100k_base", cache_size: int = 1024):
         """
         Initialize token counter
 
         Args:
-            model_name: HuggingFace model name to use for tokenization.
-                       Defaults to 'gpt2' which is publicly available and doesn't require authentication.
-                       This provides approximate token counts that are useful for monitoring.
+            model_name: tiktoken encoding name (e.g. 'cl100k_base', 'o200k_base') or an
+                       OpenAI model name to look up its encoding.
+                       Defaults to 'cl100k_base', which provides approximate token counts
+                       that are useful for monitoring. tiktoken downloads the encoding file
+                       on first use and caches it (see TIKTOKEN_CACHE_DIR), so a cold cache
+                       needs network access.
+            cache_size: Maximum number of per-message token counts to keep (default: 1024)
         """
         self.model_name = model_name
         self.logger = logging.getLogger(self.__class__.__name__)
         self._tokenizer = None
 
+        # Conversation history is append-mostly, so each message is only encoded once
+        self.cache_size = cache_size
+        self._msg_cache: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._msg_cache_lock = threading.Lock()
+
+        # Tool definitions are fixed for an agent's lifetime, so remember the last list counted
+        self._tools_cache: Optional[Tuple[List[Dict[str, Any]], int]] = None
+
     def _get_tokenizer(self):
-        """Lazy initialization of tokenizer"""
+        """Lazy initialization of tokenizer, shared across instances"""
         if self._tokenizer is None:
-            try:
-                from transformers import AutoTokenizer
-                self.logger.info("Loading tokenizer for token counting...")
-                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-                self.logger.info("Tokenizer loaded successfully")
-            except Exception as e:
-                self.logger.warning(f"Failed to load tokenizer: {e}. Token counting disabled.")
-                self._tokenizer = False
+            tokenizer = self._TOKENIZER_CACHE.get(self.model_name)
+            if tokenizer is None:
+                with self._LOCK:
+                    # Re-check under the lock so only one thread loads each tokenizer
+                    tokenizer = self._TOKENIZER_CACHE.get(self.model_name)
+                    if tokenizer is None:
+                        tokenizer = self._load_tokenizer()
+                        self._TOKENIZER_CACHE[self.model_name] = tokenizer
+            self._tokenizer = tokenizer
         return self._tokenizer if self._tokenizer is not False else None
 
+    def _load_tokenizer(self):
+        """Load the tiktoken encoding for model_name, or False if unavailable"""
+        try:
+            import tiktoken
+            self.logger.info("Loading tokenizer for token counting...")
+            try:
+                tokenizer = tiktoken.get_encoding(self.model_name)
+            except ValueError:
+                tokenizer = tiktoken.encoding_for_model(self.model_name)
+            self.logger.info("Tokenizer loaded successfully")
+            return tokenizer
+        except Exception as e:
+            self.logger.warning(f"Failed to load tokenizer: {e}. Token counting disabled.")
+            return False
+
     def count(self, messages: List[Dict[str, str]], tools: Optional[List[Dict[str, Any]]] = None) -> int:
         """
         Count tokens in messages
@@ -52,14 +86,41 @@ class TokenCounter:
             return 0
 
         try:
-            # Combine messages
-            text = "\n".join(f"{msg.get('role', '')}: {msg.get('content', '')}" for msg in messages)
+            total = sum(self._count_message(tokenizer, msg) for msg in messages)
 
             # Add tools if present
             if tools:
-                text += "\nTools:\n" + json.dumps(tools, indent=2)
+                total += self._count_tools(tokenizer, tools)
 
-            return len(tokenizer.encode(text))
+            return total
         except Exception as e:
             self.logger.warning(f"Failed to count tokens: {e}")
             return 0
+
+    def _count_tools(self, tokenizer, tools: List[Dict[str, Any]]) -> int:
+        """Count tokens in tool definitions, encoding each distinct list object once"""
+        cached = self._tools_cache
+        if cached is not None and cached[0] is tools:
+            return cached[1]
+
+        count = len(tokenizer.encode("Tools:\n" + json.dumps(tools, separators=(',', ':')), disallowed_special=()))
+        # Holding the list itself (not its id) keeps the identity check valid
+        self._tools_cache = (tools, count)
+        return count
+
+    def _count_message(self, tokenizer, msg: Dict[str, str]) -> int:
+        """Count tokens in a single message, reusing the cached count when seen before"""
+        key = (msg.get('role', ''), str(msg.get('content', '')))
+        with self._msg_cache_lock:
+            count = self._msg_cache.get(key)
+            if count is not None:
+                self._msg_cache.move_to_end(key)
+                return count
+
+        count = len(tokenizer.encode(f"{key[0]}: {key[1]}", disallowed_special=()))
+
+        with self._msg_cache_lock:
+            self._msg_cache[key] = count
+            while len(self._msg_cache) > self.cache_size:
+                self._msg_cache.popitem(last=False)
+        return count